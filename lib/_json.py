@@ -0,0 +1,10 @@
+# lib/_json.py
+# Shared JSON parser for UHT modules. Both parsers raise json.JSONDecodeError
+# (orjson's error subclasses it) on malformed input.
+import json
+
+try:
+    import orjson # Optional: faster parser that works on bytes directly
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
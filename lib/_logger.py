@@ -0,0 +1,71 @@
+# lib/_logger.py
+# Shared 'uht' logger used by the UHT library modules.
+import atexit
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+from pathlib import Path
+from termcolor import colored
+
+LOG_FILE = 'logs/install.log'
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves message formatting to the listener thread."""
+    def prepare(self, record):
+        return record
+
+def _setup_logger():
+    """
+    Builds the 'uht' logger. Records go through a queue to a background listener
+    thread that owns the install.log handler, so callers never wait on file I/O.
+    The log file is written through a 64 KiB buffer and flushed at exit.
+    """
+    uht_logger = logging.getLogger('uht')
+    uht_logger.setLevel(logging.INFO)
+    uht_logger.propagate = False
+
+    Path(LOG_FILE).parent.mkdir(parents=True, exist_ok=True)
+    log_stream = open(LOG_FILE, 'a', buffering=65536, encoding='utf-8')
+    file_handler = logging.StreamHandler(log_stream)
+    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+
+    log_queue = queue.SimpleQueue()
+    uht_logger.addHandler(_DeferredQueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, file_handler)
+    listener.start()
+    # atexit runs last-registered first: drain the queue, then flush the buffer
+    atexit.register(file_handler.flush)
+    atexit.register(listener.stop)
+    return uht_logger
+
+logger = _setup_logger()
+
+# Opening/closing escape codes per color for print_colored. Taken from termcolor
+# itself so NO_COLOR, FORCE_COLOR, ANSI_COLORS_DISABLED, TERM=dumb and tty
+# detection are decided exactly as for the termcolor-rendered menus.
+_COLOR_CODES = {color: colored("\0", color).split("\0")
+                for color in ('grey', 'red', 'green', 'yellow', 'blue', 'magenta', 'cyan', 'white')}
+
+# Serializes console output; update checks print from worker threads
+_print_lock = threading.Lock()
+
+def print_colored(text, color):
+    """Prints a line of colored text to the console and records it in the log."""
+    color_open, color_close = _COLOR_CODES[color]
+    with _print_lock:
+        sys.stdout.write(f"{color_open}{text}{color_close}\n")
+    logger.info("Console Output (%s): %s", color, text)
+
+def print_colored_lines(lines):
+    """
+    Prints a batch of (text, color) lines with a single console write
+    and records them as one log entry.
+    """
+    output = "".join(f"{_COLOR_CODES[color][0]}{text}{_COLOR_CODES[color][1]}\n" for text, color in lines)
+    with _print_lock:
+        sys.stdout.write(output)
+        sys.stdout.flush()
+    if logger.isEnabledFor(logging.INFO): # Skip building the log text when INFO is off
+        logger.info("Console Output:\n%s", "\n".join(text for text, _ in lines))
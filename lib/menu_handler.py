@@ -1,97 +1,156 @@
 import os
+import sys
+from pathlib import Path
 from termcolor import colored
 
+# Windows consoles only interpret ANSI escape sequences once VT processing has
+# been switched on; an empty os.system() call does that for the whole session.
+if os.name == 'nt':
+    os.system('')
+
+# Cursor home + erase display, used instead of spawning 'clear'/'cls'.
+_CLEAR_SCREEN = "\x1b[H\x1b[2J"
+
+# --- Precomputed menu strings ---
+# These labels never change, so their ANSI wrapping is done once at import time
+# instead of on every menu redraw.
+_BANNER_CREDIT = colored('Created by Awais Nawaz (UfaqTech)', 'magenta')
+_BANNER_TITLE = colored('Ufaq Hacking Toolkit', 'cyan')
+_CATEGORY_HEADER = colored("\nSelect a Category:", 'yellow')
+_CHECK_UPDATES_FMT = colored("[%d] Check for Updates / New Tools", 'blue')
+_SELF_UPDATE_FMT = colored("[%d] Update UHT Framework (Self-Update)", 'blue')
+_BACK_TO_MAIN = colored("[B] Back to Main Menu", 'blue')
+_BACK_TO_CATEGORY = colored("[B] Back to Category", 'blue')
+_INSTALL_OPTION = colored("[1] Install/Update Tool", 'cyan')
+_RUN_OPTION = colored("[2] Run Tool", 'green')
+_EXIT = colored("[0] Exit", 'red')
+_PROMPT = colored("\nEnter your choice: ", 'green')
+_GOODBYE = colored("\nExiting UHT. Goodbye!", 'red')
+_GO_BACK_PROMPT = colored("\nPress Enter to go back...", 'green')
+_INVALID_YES_NO = colored("Invalid input. Please enter 'y' or 'n'.", 'red')
+
+# Accepted confirm_action replies
+_YES_NO_ANSWERS = {'y': True, 'yes': True, 'n': False, 'no': False}
+# Opening/closing escape codes for per-item names. Split out of a colored() call
+# so termcolor's NO_COLOR/tty handling still applies.
+_CYAN_OPEN, _, _COLOR_CLOSE = colored("\0", 'cyan').partition("\0")
+_INSTALLED = colored("(Installed)", 'green')
+_NOT_INSTALLED = colored("(Not Installed)", 'red')
+_EXTERNAL = colored("(External/Manual)", 'yellow')
+
+def _write_lines(parts):
+    """Writes a whole menu to stdout in a single call, one part per line."""
+    sys.stdout.write("\n".join(parts) + "\n")
+    sys.stdout.flush()
+
 def clear_screen():
     """Clears the terminal screen."""
-    os.system('cls' if os.name == 'nt' else 'clear')
+    sys.stdout.write(_CLEAR_SCREEN)
+    sys.stdout.flush()
 
 def display_banner(uht_version):
     """Displays the UHT banner and version."""
-    clear_screen()
     banner = f"""
 ██╗   ██╗██╗  ██╗████████╗
 ██║   ██║██║  ██║╚══██╔══╝
 ██║   ██║███████║   ██║
 ██║   ██║██╔══██║   ██║
 ╚██████╔╝██║  ██║   ██║
- ╚═════╝ ╚═╝  ╚═╝   ╚═╝    {colored('Ufaq Hacking Toolkit', 'cyan')}
+ ╚═════╝ ╚═╝  ╚═╝   ╚═╝    {_BANNER_TITLE}
                           (UHT) {colored(f'v{uht_version}', 'green')}
 
-{colored('Created by Awais Nawaz (UfaqTech)', 'magenta')}
+{_BANNER_CREDIT}
     """
-    print(banner)
+    _write_lines([_CLEAR_SCREEN + banner])
 
 def display_main_menu(categories):
     """Displays the main category menu."""
-    print(colored("\nSelect a Category:", 'yellow'))
+    parts = [_CATEGORY_HEADER]
     for i, category in enumerate(categories):
-        print(f"[{i + 1}] {colored(category, 'cyan')}")
+        parts.append(f"[{i + 1}] {_CYAN_OPEN}{category}{_COLOR_CLOSE}")
 
     # Add fixed options at the end
     fixed_options_start_index = len(categories) + 1
-    print(colored(f"[{fixed_options_start_index}] Check for Updates / New Tools", 'blue'))
-    print(colored(f"[{fixed_options_start_index + 1}] Update UHT Framework (Self-Update)", 'blue'))
-    print(colored("[0] Exit", 'red'))
+    parts.append(_CHECK_UPDATES_FMT % fixed_options_start_index)
+    parts.append(_SELF_UPDATE_FMT % (fixed_options_start_index + 1))
+    parts.append(_EXIT)
+    _write_lines(parts)
     
     try:
-        choice = input(colored("\nEnter your choice: ", 'green')).strip()
+        choice = input(_PROMPT).strip()
         return choice
     except KeyboardInterrupt:
-        print(colored("\nExiting UHT. Goodbye!", 'red'))
+        print(_GOODBYE)
         return "0"
 
-def display_tool_menu(category_name, tools_list, installed_tools_names):
-    """Displays tools within a chosen category."""
-    clear_screen()
-    print(colored(f"UHT > {category_name} Tools\n", 'yellow'))
+def display_tool_menu(category_name, tools_list, installed_tools_names, tools_dir="tools"):
+    """
+    Displays tools within a chosen category.
+    installed_tools_names is the set returned by get_installed_tools_names(tools_dir), so
+    tools installed directly under tools_dir need a set lookup rather than a stat();
+    tools installed anywhere else (e.g. wordlists/) are still checked on disk.
+    """
+    tools_dir_path = Path(tools_dir)
+    parts = [_CLEAR_SCREEN + colored(f"UHT > {category_name} Tools\n", 'yellow')]
 
     if not tools_list:
-        print(colored(f"No compatible tools found in '{category_name}' category for your OS yet.", 'red'))
-        input(colored("\nPress Enter to go back...", 'green'))
+        parts.append(colored(f"No compatible tools found in '{category_name}' category for your OS yet.", 'red'))
+        _write_lines(parts)
+        input(_GO_BACK_PROMPT)
         return None
 
     for i, tool in enumerate(tools_list):
-        status = colored("(Not Installed)", 'red')
-        if tool['install_path'] and Path(tool['install_path']).exists(): # Check if install_path exists
-            status = colored("(Installed)", 'green')
-        elif not tool['github_url'] and not tool['install_path']: # For web resources/manual tools
-             status = colored("(External/Manual)", 'yellow')
-        
-        print(f"[{i + 1}] {colored(tool['name'], 'cyan')} {status}")
+        install_path = tool['install_path']
+        if install_path:
+            tool_path = Path(install_path)
+            if tool_path.parent == tools_dir_path:
+                installed = tool_path.name in installed_tools_names
+            else:
+                installed = tool_path.exists()
+        else:
+            installed = False
+        if installed:
+            status = _INSTALLED
+        elif not tool['github_url'] and not install_path: # For web resources/manual tools
+            status = _EXTERNAL
+        else:
+            status = _NOT_INSTALLED
 
-    print(colored("[B] Back to Main Menu", 'blue'))
-    print(colored("[0] Exit", 'red'))
+        parts.append(f"[{i + 1}] {_CYAN_OPEN}{tool['name']}{_COLOR_CLOSE} {status}")
+
+    parts.append(_BACK_TO_MAIN)
+    parts.append(_EXIT)
+    _write_lines(parts)
 
     try:
-        choice = input(colored("\nEnter your choice: ", 'green')).strip()
+        choice = input(_PROMPT).strip()
         return choice
     except KeyboardInterrupt:
-        print(colored("\nExiting UHT. Goodbye!", 'red'))
+        print(_GOODBYE)
         return "0"
 
 def display_tool_options(tool_name):
     """Displays options for a specific tool."""
-    clear_screen()
-    print(colored(f"UHT > {tool_name}\n", 'yellow'))
-    print(colored("[1] Install/Update Tool", 'cyan'))
-    print(colored("[2] Run Tool", 'green'))
-    print(colored("[B] Back to Category", 'blue'))
-    print(colored("[0] Exit", 'red'))
+    _write_lines([
+        _CLEAR_SCREEN + colored(f"UHT > {tool_name}\n", 'yellow'),
+        _INSTALL_OPTION,
+        _RUN_OPTION,
+        _BACK_TO_CATEGORY,
+        _EXIT,
+    ])
 
     try:
-        choice = input(colored("\nEnter your choice: ", 'green')).strip()
+        choice = input(_PROMPT).strip()
         return choice
     except KeyboardInterrupt:
-        print(colored("\nExiting UHT. Goodbye!", 'red'))
+        print(_GOODBYE)
         return "0"
 
 def confirm_action(prompt):
     """Asks for user confirmation."""
+    question = colored(f"{prompt} (y/n): ", 'yellow')
     while True:
-        response = input(colored(f"{prompt} (y/n): ", 'yellow')).strip().lower()
-        if response == 'y':
-            return True
-        elif response == 'n':
-            return False
-        else:
-            print(colored("Invalid input. Please enter 'y' or 'n'.", 'red'))
+        answer = _YES_NO_ANSWERS.get(input(question).strip().lower())
+        if answer is not None:
+            return answer
+        print(_INVALID_YES_NO)
@@ -1,189 +1,251 @@
 # lib/os_utils.py
+import collections
+import functools
 import platform
+import re
+import shutil
 import subprocess
+import sys
 import os
 from pathlib import Path
-import logging
-from termcolor import colored
+from lib._logger import logger, print_colored
 
-logging.basicConfig(filename='logs/install.log', level=logging.INFO,
-                    format='%(asctime)s - %(levelname)s - %(message)s')
+# Number of trailing output lines kept for the log record of each command
+COMMAND_LOG_TAIL_LINES = 1000
 
-def print_colored_os_utils(text, color, on_color=None, attrs=None):
-    """Helper function to print colored text to console from os_utils."""
-    print(colored(text, color, on_color, attrs))
-    logging.info(f"Console Output ({color}): {text}")
-
-def run_command_in_os_utils(command, description, check_output=False, suppress_error=False, cwd=None):
+def run_command_in_os_utils(command, description, check_output=False, suppress_error=False, cwd=None, shell=None):
     """
-    Runs a shell command and logs its output.
+    Runs a command, echoing its output to the console as it is produced.
+    Only the last COMMAND_LOG_TAIL_LINES lines are kept for the log, so memory use
+    does not grow with the size of the output.
+    String commands (e.g. post-install steps with '&&' or pipes) go through the shell;
+    argv lists are executed directly unless shell=True is passed.
     Returns True on success, False on failure.
-    This version uses shell=True for broader command compatibility.
     """
     cmd_str = command if isinstance(command, str) else ' '.join(command)
-    print_colored_os_utils(f"[*] {description}...", "blue")
-    logging.info(f"Executing command: {cmd_str}")
+    if shell is None:
+        shell = isinstance(command, str)
+    elif shell:
+        command = cmd_str
+    print_colored(f"[*] {description}...", "blue")
+    logger.info("Executing command: %s", cmd_str)
     try:
-        result = subprocess.run(cmd_str, shell=True, check=True, capture_output=True, text=True, encoding='utf-8', cwd=cwd)
-        logging.info(f"Command '{cmd_str}' stdout:\n{result.stdout.strip()}")
-        if result.stderr:
-            logging.warning(f"Command '{cmd_str}' stderr:\n{result.stderr.strip()}")
-        print_colored_os_utils(f"[+] {description} completed successfully.", "green")
+        output_tail = collections.deque(maxlen=COMMAND_LOG_TAIL_LINES)
+        with subprocess.Popen(command, shell=shell, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                              text=True, encoding='utf-8', errors='replace', bufsize=1, cwd=cwd) as process:
+            for line in process.stdout:
+                sys.stdout.write(line)
+                output_tail.append(line)
+        output = ''.join(output_tail).strip()
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, cmd_str, output=output)
+        logger.info("Command '%s' output:\n%s", cmd_str, output)
+        print_colored(f"[+] {description} completed successfully.", "green")
         return True
     except subprocess.CalledProcessError as e:
-        logging.error(f"Command '{cmd_str}' failed with exit code {e.returncode}. stderr:\n{e.stderr.strip()}")
+        logger.error("Command '%s' failed with exit code %d. output:\n%s", cmd_str, e.returncode, e.output)
         if not suppress_error:
-            print_colored_os_utils(f"[ERROR] {description} failed: {e.stderr.strip()}", "red")
+            print_colored(f"[ERROR] {description} failed with exit code {e.returncode}. See output above.", "red")
         return False
     except FileNotFoundError:
-        print_colored_os_utils(f"[ERROR] Command '{command[0] if isinstance(command, list) else command.split()[0]}' not found. Is it in PATH?", "red")
-        logging.error(f"Command '{command[0] if isinstance(command, list) else command.split()[0]}' not found.")
+        print_colored(f"[ERROR] Command '{command[0] if isinstance(command, list) else command.split()[0]}' not found. Is it in PATH?", "red")
+        logger.error("Command '%s' not found.", command[0] if isinstance(command, list) else command.split()[0])
         return False
     except Exception as e:
-        logging.error(f"An unexpected error occurred during '{cmd_str}': {e}")
+        logger.error("An unexpected error occurred during '%s': %s", cmd_str, e)
         if not suppress_error:
-            print_colored_os_utils(f"[ERROR] An unexpected error occurred during {description}: {e}", "red")
+            print_colored(f"[ERROR] An unexpected error occurred during {description}: {e}", "red")
         return False
 
-def get_os_type():
-    """Detects the operating system type."""
+# KEY=value lines of /etc/os-release; values may be wrapped in quotes
+_OS_RELEASE_RE = re.compile(r'^(\w+)=(.*)$', re.M)
+
+def _parse_os_release(content):
+    """Parses /etc/os-release contents into a dict of unquoted values."""
+    return {key: value.strip().strip('"\'') for key, value in _OS_RELEASE_RE.findall(content)}
+
+@functools.lru_cache(maxsize=1)
+def _detect_os_type():
+    """
+    Detects the operating system type without any console or log output.
+    Returns a tuple of (os_type, console_message, console_color, log_message).
+    The result is cached since the OS cannot change during a session.
+    """
     system = platform.system()
     if 'ANDROID_ROOT' in os.environ or Path('/data/data/com.termux/files').is_dir():
-        print_colored_os_utils("[+] Detected OS: Termux", "green")
-        logging.info("Detected OS: Termux")
-        return "termux"
+        return "termux", "[+] Detected OS: Termux", "green", "Detected OS: Termux"
     elif system == "Linux":
         if Path("/etc/os-release").exists():
             with open("/etc/os-release", "r") as f:
-                content = f.read()
-                if "ID=debian" in content or "ID_LIKE=debian" in content or "ID=ubuntu" in content:
-                    print_colored_os_utils("[+] Detected OS: Debian/Ubuntu-based Linux", "green")
-                    logging.info("Detected OS: Debian_Based_Linux")
-                    return "debian_based_linux"
-                elif "ID=arch" in content or "ID_LIKE=arch" in content:
-                    print_colored_os_utils("[+] Detected OS: Arch-based Linux", "green")
-                    logging.info("Detected OS: Arch_Based_Linux")
-                    return "arch_based_linux"
-            print_colored_os_utils("[!] Detected OS: Other Linux distribution. Package management might differ.", "yellow")
-            logging.info("Detected OS: Other_Linux (Fallback)")
-            return "linux" # Generic Linux for other distros
-        print_colored_os_utils("[!] Detected OS: Generic Linux (No os-release found).", "yellow")
-        logging.info("Detected OS: Generic_Linux (No os-release)")
-        return "linux"
+                fields = _parse_os_release(f.read())
+            distro_ids = {fields.get('ID', '')}
+            distro_ids.update(fields.get('ID_LIKE', '').split()) # ID_LIKE may list several parents
+            if distro_ids & {"debian", "ubuntu"}:
+                return ("debian_based_linux", "[+] Detected OS: Debian/Ubuntu-based Linux", "green",
+                        "Detected OS: Debian_Based_Linux")
+            elif "arch" in distro_ids:
+                return ("arch_based_linux", "[+] Detected OS: Arch-based Linux", "green",
+                        "Detected OS: Arch_Based_Linux")
+            return ("linux", "[!] Detected OS: Other Linux distribution. Package management might differ.", "yellow",
+                    "Detected OS: Other_Linux (Fallback)") # Generic Linux for other distros
+        return ("linux", "[!] Detected OS: Generic Linux (No os-release found).", "yellow",
+                "Detected OS: Generic_Linux (No os-release)")
     elif system == "Windows":
-        print_colored_os_utils("[+] Detected OS: Windows", "green")
-        logging.info("Detected OS: Windows")
-        return "windows"
+        return "windows", "[+] Detected OS: Windows", "green", "Detected OS: Windows"
     elif system == "Darwin": # macOS
-        print_colored_os_utils("[+] Detected OS: macOS", "green")
-        logging.info("Detected OS: macos")
-        return "macos"
-    print_colored_os_utils(f"[ERROR] Unsupported OS detected: {system}. Exiting.", "red")
-    logging.critical(f"Unsupported OS detected: {system}")
-    return "unsupported" # Return unsupported instead of exiting, let main handle
+        return "macos", "[+] Detected OS: macOS", "green", "Detected OS: macos"
+    # Return unsupported instead of exiting, let main handle
+    return ("unsupported", f"[ERROR] Unsupported OS detected: {system}. Exiting.", "red",
+            f"Unsupported OS detected: {system}")
 
-def check_command_exists(command_name):
-    """Checks if a command exists in the system's PATH."""
-    try:
-        subprocess.run(['which', command_name], check=True, capture_output=True, text=True)
-        return True
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        return False
+def get_os_type():
+    """Returns the (cached) operating system type."""
+    return _detect_os_type()[0]
 
-def install_system_package(package_name, os_type):
-    """
-    Checks if a system package is installed and attempts to install/update it.
-    Returns True if package is available/installed, False otherwise.
-    """
-    print_colored_os_utils(f"[*] Checking for system package: {package_name}", "blue")
-    logging.info(f"Checking for system package: {package_name} on {os_type}")
+def announce_os_type():
+    """Prints and logs the detected operating system. Meant to be called once at startup."""
+    os_type, message, color, log_message = _detect_os_type()
+    print_colored(message, color)
+    if os_type == "unsupported":
+        logger.critical(log_message)
+    else:
+        logger.info(log_message)
+    return os_type
 
-    if package_name.strip() == "":
-        return True # Empty dependency is always "met"
+# Per-session results of install_system_package's presence probe. A package only
+# ever goes from missing to installed, so a "present" entry never goes stale.
+_checked_present = set()
+_checked_absent = set()
 
-    # Special check for python/python3 as they might be installed but 'which python' might point to venv
-    if package_name in ["python", "python3", "pip", "pip3", "go", "java", "perl", "ruby", "bash", "powershell"]:
-        if check_command_exists(package_name):
-            print_colored_os_utils(f"[+] {package_name} is already installed.", "green")
-            return True
-        # For Java, check for common java executables
-        if package_name == "java":
-            if check_command_exists("java") or check_command_exists("javac"):
-                print_colored_os_utils(f"[+] Java (or JDK) is already installed.", "green")
-                return True
-    else: # For other commands, just check if the command itself exists
-        if check_command_exists(package_name):
-            print_colored_os_utils(f"[+] {package_name} is already installed.", "green")
-            return True
+@functools.lru_cache(maxsize=None)
+def check_command_exists(command_name):
+    """Checks if a command exists in the system's PATH. Results are cached per command."""
+    return shutil.which(command_name) is not None
 
-    print_colored_os_utils(f"[!] {package_name} not found. Attempting to install...", "yellow")
-    install_cmd = []
-    update_cmd = []
+def invalidate_command_cache():
+    """Forgets cached check_command_exists results, e.g. after a package was installed."""
+    check_command_exists.cache_clear()
 
+# OS types whose package list has already been refreshed this session
+_refreshed_package_lists = set()
+
+def _get_installer(os_type):
+    """
+    Resolves the package manager for os_type.
+    Returns (update_cmd, install_cmd_for), where update_cmd may be None and
+    install_cmd_for(package_name) builds the install command. install_cmd_for is
+    None if no supported package manager is available.
+    Meant to be resolved once per tool and passed to install_system_package.
+    """
     if os_type == "termux":
-        update_cmd = ['pkg', 'update', '-y']
-        install_cmd = ['pkg', 'install', '-y', package_name]
+        return ['pkg', 'update', '-y'], lambda pkg: ['pkg', 'install', '-y', pkg]
     elif os_type == "debian_based_linux":
-        update_cmd = ['sudo', 'apt', 'update', '-y']
-        install_cmd = ['sudo', 'apt', 'install', '-y', package_name]
+        return ['sudo', 'apt', 'update', '-y'], lambda pkg: ['sudo', 'apt', 'install', '-y', pkg]
     elif os_type == "arch_based_linux":
-        update_cmd = ['sudo', 'pacman', '-Sy', '--noconfirm']
-        install_cmd = ['sudo', 'pacman', '-S', '--noconfirm', package_name]
+        return ['sudo', 'pacman', '-Sy', '--noconfirm'], lambda pkg: ['sudo', 'pacman', '-S', '--noconfirm', pkg]
     elif os_type == "windows":
         # For Windows, we assume Chocolatey or Winget.
         # Note: Winget needs exact IDs. This is a best-effort attempt.
         if check_command_exists("choco"):
-            install_cmd = ['choco', 'install', '-y', package_name]
+            return None, lambda pkg: ['choco', 'install', '-y', pkg]
         elif check_command_exists("winget"):
             # This is a simplification. Winget often needs --id and specific package IDs.
             # E.g., 'winget install --id Git.Git' not 'winget install git'
             # For most common tools, the name might work.
-            install_cmd = ['winget', 'install', '-e', '--id', package_name] # -e for exact match
-            print_colored_os_utils("[WARNING] Winget might require exact package IDs. If installation fails, try manual install.", "yellow")
-        else:
-            print_colored_os_utils("[ERROR] Neither Chocolatey nor Winget found. Please install them or install dependencies manually on Windows.", "red")
-            logging.error("No package manager found for Windows.")
-            return False
+            print_colored("[WARNING] Winget might require exact package IDs. If installation fails, try manual install.", "yellow")
+            return None, lambda pkg: ['winget', 'install', '-e', '--id', pkg] # -e for exact match
+        print_colored("[ERROR] Neither Chocolatey nor Winget found. Please install them or install dependencies manually on Windows.", "red")
+        logger.error("No package manager found for Windows.")
+        return None, None
     elif os_type == "macos":
         # For macOS, we assume Homebrew
         if check_command_exists("brew"):
-            update_cmd = ['brew', 'update']
-            install_cmd = ['brew', 'install', package_name]
-        else:
-            print_colored_os_utils("[ERROR] Homebrew not found. Please install Homebrew or install dependencies manually on macOS.", "red")
-            logging.error("Homebrew not found for macOS.")
-            return False
-    else: # Generic Linux or unsupported
-        print_colored_os_utils(f"[ERROR] Automatic installation for '{package_name}' not supported on this OS type ('{os_type}'). Please install manually.", "red")
-        logging.error(f"Cannot auto-install '{package_name}' on generic/unsupported OS.")
+            return ['brew', 'update'], lambda pkg: ['brew', 'install', pkg]
+        print_colored("[ERROR] Homebrew not found. Please install Homebrew or install dependencies manually on macOS.", "red")
+        logger.error("Homebrew not found for macOS.")
+        return None, None
+    return None, None # Generic Linux or unsupported
+
+def install_system_package(package_name, os_type, installers=None):
+    """
+    Checks if a system package is installed and attempts to install/update it.
+    installers is an optional {os_type: installer} dict shared across calls (e.g. one
+    tool's dependencies); the package manager is resolved on the first missing
+    package and reused from it afterwards.
+    Returns True if package is available/installed, False otherwise.
+    """
+    print_colored(f"[*] Checking for system package: {package_name}", "blue")
+    logger.info("Checking for system package: %s on %s", package_name, os_type)
+
+    if package_name.strip() == "":
+        return True # Empty dependency is always "met"
+
+    if package_name in _checked_present:
+        print_colored(f"[+] {package_name} is already installed.", "green")
+        return True
+
+    if package_name not in _checked_absent: # Known-missing packages go straight to installation
+        # Special check for python/python3 as they might be installed but 'which python' might point to venv
+        if package_name in ["python", "python3", "pip", "pip3", "go", "java", "perl", "ruby", "bash", "powershell"]:
+            if check_command_exists(package_name):
+                print_colored(f"[+] {package_name} is already installed.", "green")
+                _checked_present.add(package_name)
+                return True
+            # For Java, check for common java executables
+            if package_name == "java":
+                if check_command_exists("java") or check_command_exists("javac"):
+                    print_colored(f"[+] Java (or JDK) is already installed.", "green")
+                    _checked_present.add(package_name)
+                    return True
+        else: # For other commands, just check if the command itself exists
+            if check_command_exists(package_name):
+                print_colored(f"[+] {package_name} is already installed.", "green")
+                _checked_present.add(package_name)
+                return True
+        _checked_absent.add(package_name)
+
+    print_colored(f"[!] {package_name} not found. Attempting to install...", "yellow")
+    if installers is None:
+        installers = {}
+    if os_type not in installers:
+        installers[os_type] = _get_installer(os_type)
+    update_cmd, install_cmd_for = installers[os_type]
+    if install_cmd_for is None:
+        if os_type not in ("windows", "macos"): # Those already reported their missing package manager
+            print_colored(f"[ERROR] Automatic installation for '{package_name}' not supported on this OS type ('{os_type}'). Please install manually.", "red")
+            logger.error("Cannot auto-install '%s' on generic/unsupported OS.", package_name)
         return False
 
-    # First, run update command for the package manager (if applicable)
-    if update_cmd:
-        if not run_command_in_os_utils(update_cmd, f"Updating package list for {os_type}", suppress_error=True):
-            print_colored_os_utils(f"[WARNING] Failed to update package list for {os_type}. Trying to install {package_name} anyway.", "yellow")
-            logging.warning(f"Failed to update package list for {os_type}.")
+    # First, refresh the package manager's package list (once per session, retried until it succeeds)
+    if update_cmd and os_type not in _refreshed_package_lists:
+        if run_command_in_os_utils(update_cmd, f"Updating package list for {os_type}", suppress_error=True):
+            _refreshed_package_lists.add(os_type)
+        else:
+            print_colored(f"[WARNING] Failed to update package list for {os_type}. Trying to install {package_name} anyway.", "yellow")
+            logger.warning("Failed to update package list for %s.", os_type)
 
     # Then, run install command
-    if install_cmd:
-        if run_command_in_os_utils(install_cmd, f"Installing {package_name}"):
-            return True
+    if run_command_in_os_utils(install_cmd_for(package_name), f"Installing {package_name}"):
+        invalidate_command_cache() # The new package may have added commands to PATH
+        _checked_absent.discard(package_name)
+        _checked_present.add(package_name)
+        return True
     return False
 
 def install_python_requirements(tool_path):
     """Installs Python requirements from a requirements.txt file within a tool's directory."""
     req_file = Path(tool_path) / "requirements.txt"
     if req_file.exists():
-        print_colored_os_utils(f"[*] Installing Python requirements for {tool_path}...", "blue")
-        logging.info(f"Installing Python requirements for {tool_path}")
+        print_colored(f"[*] Installing Python requirements for {tool_path}...", "blue")
+        logger.info("Installing Python requirements for %s", tool_path)
         
         # Use 'pip3' if available, otherwise 'pip'
         pip_cmd_base = ['pip3']
         if not check_command_exists('pip3'):
             pip_cmd_base = ['pip']
             if not check_command_exists('pip'):
-                print_colored_os_utils("[ERROR] Neither 'pip3' nor 'pip' found. Cannot install Python requirements.", "red")
-                logging.error("Neither 'pip3' nor 'pip' found for Python requirements.")
+                print_colored("[ERROR] Neither 'pip3' nor 'pip' found. Cannot install Python requirements.", "red")
+                logger.error("Neither 'pip3' nor 'pip' found for Python requirements.")
                 return False
 
         pip_cmd = pip_cmd_base + ['install', '-r', str(req_file)]
@@ -191,7 +253,7 @@ def install_python_requirements(tool_path):
         if run_command_in_os_utils(pip_cmd, f"Installing Python packages for {tool_path}"):
             return True
     else:
-        print_colored_os_utils(f"[INFO] No requirements.txt found for {tool_path}.", "yellow")
-        logging.info(f"No requirements.txt found for {tool_path}.")
+        print_colored(f"[INFO] No requirements.txt found for {tool_path}.", "yellow")
+        logger.info("No requirements.txt found for %s.", tool_path)
     return False
 
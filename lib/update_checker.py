@@ -1,137 +1,349 @@
 import requests
-import json5 # Use json5 for more robust JSON parsing if needed
-import logging
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
+from urllib3.util.retry import Retry
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
 from pathlib import Path
-from termcolor import colored
 import subprocess
-import json # For loading local tools.json
+import json
+from lib._json import json_loads # Fast path for parsing tools.json; json5 is the fallback
+try:
+    import ijson # Optional: parses large remote catalogs while they download
+except ImportError:
+    ijson = None
+try:
+    import pygit2 # Optional: reads local repository state in-process via libgit2
+except ImportError:
+    pygit2 = None
 
-logging.basicConfig(filename='logs/install.log', level=logging.INFO,
-                    format='%(asctime)s - %(levelname)s - %(message)s')
+from lib._logger import logger, print_colored, print_colored_lines # Shared logger and console helpers
 
-def print_colored_update_checker(text, color, on_color=None, attrs=None):
-    """Helper function to print colored text to console from update_checker."""
-    print(colored(text, color, on_color, attrs))
-    logging.info(f"Console Output ({color}): {text}")
+# Shared HTTP session so repeated requests to the same host reuse pooled
+# keep-alive connections instead of a fresh TCP+TLS handshake each time
+_SESSION = requests.Session()
+_SESSION.mount('https://', HTTPAdapter(pool_connections=10, pool_maxsize=20,
+                                       max_retries=Retry(total=2, backoff_factor=0.3)))
+
+# Last fetched remote tools.json with its validators, for conditional requests
+REMOTE_CACHE_PATH = Path('logs/.tools_json_cache')
+# Parsed remote tools.json per URL with the validators it was fetched with, so a
+# 304 Not Modified answer needs neither the disk cache nor a parse
+_remote_data_memo = {}
+
+# Recently seen remote HEADs per tool, so repeated update checks skip the network
+UPDATE_CACHE_PATH = Path('logs/.update_cache.json')
+UPDATE_CHECK_TTL = 3600 # Seconds a cached remote HEAD stays valid
+
+# Remote catalogs at least this large are parsed incrementally when ijson is available
+STREAM_PARSE_MIN_BYTES = 32 * 1024
+
+def _parse_tools_json(text, raw=None):
+    """Parses tools.json content, preferring orjson/stdlib json (on raw bytes if given) over json5."""
+    try:
+        # tools.json is strict JSON in practice, so try the C parser first
+        return json_loads(raw if raw is not None else text)
+    except json.JSONDecodeError: # orjson.JSONDecodeError subclasses this
+        import json5 # Use json5 for more robust JSON parsing if needed; imported only on this fallback
+        return json5.loads(text)
+
+def _stream_parse_tools_json(response):
+    """
+    Parses a streamed tools.json response category by category with ijson, so
+    parsing overlaps the download and the raw body is never held in memory.
+    Returns None if the stream is not strict JSON.
+    """
+    response.raw.decode_content = True # Let urllib3 undo gzip content encoding
+    try:
+        return dict(ijson.kvitems(response.raw, '', use_float=True))
+    except ijson.JSONError as e:
+        logger.warning("Streaming parse of remote tools.json failed (%s); retrying with json5.", e)
+        return None
+
+def _read_remote_cache(remote_url):
+    """Returns the cached {url, etag, last_modified, body} entry for remote_url, or None."""
+    try:
+        with open(REMOTE_CACHE_PATH, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cache.get('url') != remote_url or 'body' not in cache:
+        return None
+    return cache
+
+def _write_remote_cache(remote_url, etag, last_modified, body):
+    """Stores a successful response's body with its ETag/Last-Modified validators."""
+    try:
+        REMOTE_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with open(REMOTE_CACHE_PATH, 'w', encoding='utf-8') as f:
+            json.dump({'url': remote_url, 'etag': etag, 'last_modified': last_modified,
+                       'body': body}, f)
+    except OSError as e:
+        logger.warning("Could not write remote tools.json cache: %s", e)
 
 def get_remote_tools_data(remote_url):
     """Fetches the latest tools.json from a remote URL."""
     if not remote_url:
-        print_colored_update_checker("[ERROR] Remote tools.json URL is not configured in settings.json.", "red")
-        logging.error("Remote tools.json URL is empty.")
+        print_colored("[ERROR] Remote tools.json URL is not configured in settings.json.", "red")
+        logger.error("Remote tools.json URL is empty.")
         return None
 
     try:
-        print_colored_update_checker(f"\n[*] Fetching latest tool definitions from {remote_url}...", "blue")
-        response = requests.get(remote_url, timeout=15) # Increased timeout
-        response.raise_for_status() # Raise an HTTPError for bad responses (4xx or 5xx)
-        return json5.loads(response.text)
+        print_colored(f"\n[*] Fetching latest tool definitions from {remote_url}...", "blue")
+        cache = _remote_data_memo.get(remote_url) or _read_remote_cache(remote_url)
+        headers = {}
+        if cache:
+            # Let the server answer 304 Not Modified instead of resending an unchanged file
+            if cache.get('etag'):
+                headers['If-None-Match'] = cache['etag']
+            if cache.get('last_modified'):
+                headers['If-Modified-Since'] = cache['last_modified']
+        # (connect, read) timeouts; the body is only read once we know how to parse it
+        with _SESSION.get(remote_url, timeout=(5, 15), headers=headers, stream=True) as response:
+            if response.status_code == 304 and cache:
+                logger.info("Remote tools.json not modified since last fetch; using cached copy.")
+                if 'data' not in cache: # Read from disk; parse it once for this session
+                    cache = {'etag': cache.get('etag'), 'last_modified': cache.get('last_modified'),
+                             'data': _parse_tools_json(cache['body'])}
+                    _remote_data_memo[remote_url] = cache
+                return cache['data']
+            response.raise_for_status() # Raise an HTTPError for bad responses (4xx or 5xx)
+
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            tools_data = None
+            body = None # After a streamed parse, serialized below only if there are validators
+            content_length = int(response.headers.get('Content-Length') or 0) # Size on the wire
+            streamed = ijson is not None and content_length >= STREAM_PARSE_MIN_BYTES
+            if streamed:
+                tools_data = _stream_parse_tools_json(response)
+            if tools_data is None:
+                if streamed:
+                    # The stream was partly consumed; fetch the body again for the json5 fallback
+                    with _SESSION.get(remote_url, timeout=(5, 15)) as refetched:
+                        refetched.raise_for_status()
+                        etag = refetched.headers.get('ETag')
+                        last_modified = refetched.headers.get('Last-Modified')
+                        body, raw = refetched.text, refetched.content
+                else:
+                    body, raw = response.text, response.content
+                tools_data = _parse_tools_json(body, raw)
+        if etag or last_modified: # Only responses with validators can be revalidated later
+            if body is None:
+                body = json.dumps(tools_data)
+            _write_remote_cache(remote_url, etag, last_modified, body)
+            _remote_data_memo[remote_url] = {'etag': etag, 'last_modified': last_modified, 'data': tools_data}
+        return tools_data
     except requests.exceptions.Timeout:
-        logging.error(f"Timeout occurred while fetching remote tools.json from {remote_url}.")
-        print_colored_update_checker(f"[ERROR] Request timed out while fetching remote tool data. Check your internet connection.", "red")
+        logger.error("Timeout occurred while fetching remote tools.json from %s.", remote_url)
+        print_colored(f"[ERROR] Request timed out while fetching remote tool data. Check your internet connection.", "red")
         return None
     except requests.exceptions.ConnectionError:
-        logging.error(f"Connection error occurred while fetching remote tools.json from {remote_url}.")
-        print_colored_update_checker(f"[ERROR] Connection error while fetching remote tool data. Check your internet connection.", "red")
+        logger.error("Connection error occurred while fetching remote tools.json from %s.", remote_url)
+        print_colored(f"[ERROR] Connection error while fetching remote tool data. Check your internet connection.", "red")
+        return None
+    except Urllib3HTTPError as e: # ijson reads response.raw, so requests does not wrap these
+        logger.error("Connection error occurred while streaming remote tools.json from %s: %s", remote_url, e)
+        print_colored("[ERROR] Connection error while fetching remote tool data. Check your internet connection.", "red")
         return None
     except requests.exceptions.RequestException as e:
-        logging.error(f"Failed to fetch remote tools.json from {remote_url}: {e}")
-        print_colored_update_checker(f"[ERROR] Could not fetch remote tool data: {e}", "red")
+        logger.error("Failed to fetch remote tools.json from %s: %s", remote_url, e)
+        print_colored(f"[ERROR] Could not fetch remote tool data: {e}", "red")
+        return None
+    except ValueError as e: # Raised by both json and json5 on malformed input
+        logger.error("Failed to parse remote tools.json: %s", e)
+        print_colored(f"[ERROR] Failed to parse remote tool data: {e}. Remote file might be malformed.", "red")
+        return None
+
+def _run_git_for_update_check(tool_name, git_args, timeout=None):
+    """
+    Runs a git command as part of a tool's update check.
+    Returns its stdout, or None (after reporting the error) if git exited non-zero.
+    Failures are detected from the return code rather than raised as exceptions.
+    """
+    result = subprocess.run(['git'] + git_args, check=False, capture_output=True, text=True, timeout=timeout)
+    if result.returncode != 0:
+        logger.warning("Could not check update for %s (git error): %s", tool_name, result.stderr.strip())
+        print_colored(f"[WARNING] Could not check update for {tool_name} (Git error). See logs.", "yellow")
+        return None
+    return result.stdout
+
+def _read_local_head(tool_path):
+    """
+    Returns the HEAD commit SHA of a local repository using pygit2, without spawning git.
+    Returns None if pygit2 is not installed or cannot read the repository, in which
+    case the caller falls back to 'git rev-parse'.
+    """
+    if pygit2 is None:
         return None
-    except json5.JSON5Error as e:
-        logging.error(f"Failed to parse remote tools.json: {e}")
-        print_colored_update_checker(f"[ERROR] Failed to parse remote tool data: {e}. Remote file might be malformed.", "red")
+    try:
+        return str(pygit2.Repository(tool_path).head.target)
+    except (pygit2.GitError, KeyError, ValueError) as e:
+        logger.info("pygit2 could not read HEAD of %s (%s); falling back to git.", tool_path, e)
+        return None
+
+def _load_update_cache():
+    """Loads the {repo url: {sha, ts}} cache of recent remote HEAD lookups."""
+    try:
+        with open(UPDATE_CACHE_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_update_cache(update_cache):
+    """Writes the remote HEAD lookup cache back to disk, dropping expired entries."""
+    now = time.time()
+    live_entries = {repo_url: entry for repo_url, entry in update_cache.items()
+                    if isinstance(entry, dict) and now - entry.get('ts', 0) < UPDATE_CHECK_TTL}
+    try:
+        UPDATE_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with open(UPDATE_CACHE_PATH, 'w', encoding='utf-8') as f:
+            json.dump(live_entries, f)
+    except OSError as e:
+        logger.warning("Could not write update check cache: %s", e)
+
+def _read_tool_head(local_tool_data):
+    """
+    Reads the local HEAD commit of one installed tool's git repository.
+    Returns the SHA, or None if the tool is not a clonable, cloned tool or HEAD
+    could not be read. Safe to run from worker threads.
+    """
+    tool_name = local_tool_data['name']
+    tool_path_str = local_tool_data.get('install_path')
+    repo_url = local_tool_data.get('github_url')
+
+    if not (tool_path_str and repo_url): # Only check if it's a clonable tool
+        logger.info("Skipping update check for %s: no github_url or install_path defined.", tool_name)
+        return None
+
+    # Plain os.path checks; no Path objects needed per tool
+    if not (os.path.isdir(tool_path_str) and os.path.isdir(os.path.join(tool_path_str, '.git'))):
+        logger.info("Skipping update check for %s: not a git repository or install path missing.", tool_name)
+        return None
+
+    try:
+        local_head = _read_local_head(tool_path_str)
+        if local_head is None:
+            local_head = _run_git_for_update_check(tool_name, ['-C', tool_path_str, 'rev-parse', 'HEAD'])
+        return local_head.strip() if local_head is not None else None
+    except Exception as e:
+        logger.warning("Unexpected error checking update for %s: %s", tool_name, e)
+        print_colored(f"[WARNING] Unexpected error checking update for {tool_name}. See logs.", "yellow")
+    return None
+
+def _ls_remote_head(repo_url, tool_names):
+    """
+    Returns the HEAD commit SHA of a remote repository, or None on failure.
+    ls-remote is a single round-trip that downloads no objects, unlike a full fetch.
+    tool_names are the tools cloned from repo_url; they are named in any error message.
+    Safe to run from worker threads.
+    """
+    label = ", ".join(tool_names)
+    try:
+        ls_remote_output = _run_git_for_update_check(label, ['ls-remote', repo_url, 'HEAD'], timeout=10)
+    except Exception as e:
+        logger.warning("Unexpected error checking update for %s: %s", label, e)
+        print_colored(f"[WARNING] Unexpected error checking update for {label}. See logs.", "yellow")
+        return None
+    if ls_remote_output is None:
+        return None
+    remote_refs = ls_remote_output.split()
+    if not remote_refs:
+        logger.warning("Could not check update for %s: remote reported no HEAD.", label)
         return None
+    return remote_refs[0]
 
-def check_for_tool_updates_and_new_tools(local_tools_data, remote_tools_data, installed_tools_names):
+def check_for_tool_updates_and_new_tools(local_tools_data, remote_tools_data, installed_tools_names, local_flat_tools=None):
     """
     Compares local and remote tool data to find new tools and updates.
+    local_flat_tools is an optional pre-built {tool name: tool data} mapping of
+    local_tools_data; it is built here when not given.
     Returns lists of (new_tools, tools_to_update).
     """
     new_tools = []
     tools_to_update = [] # List of (tool_name, tool_data)
 
     if not remote_tools_data:
-        print_colored_update_checker("[WARNING] Remote tool data not available for update check.", "yellow")
+        print_colored("[WARNING] Remote tool data not available for update check.", "yellow")
         return new_tools, tools_to_update
 
-    remote_flat_tools = {}
-    for category_tools in remote_tools_data.values():
-        for tool in category_tools:
-            remote_flat_tools[tool['name']] = tool
-
-    local_flat_tools = {}
-    for category_tools in local_tools_data.values():
-        for tool in category_tools:
-            local_flat_tools[tool['name']] = tool
+    installed_set = installed_tools_names if isinstance(installed_tools_names, (set, frozenset)) else set(installed_tools_names)
+    remote_flat_tools = {tool['name']: tool for tool in chain.from_iterable(remote_tools_data.values())}
+    if local_flat_tools is None:
+        local_flat_tools = {tool['name']: tool for tool in chain.from_iterable(local_tools_data.values())}
 
     # Check for new tools
-    for tool_name, tool_data in remote_flat_tools.items():
-        # A tool is "new" if it's in the remote list but not in our local installed directories
-        # AND it's not already present in our local tools.json (meaning we haven't seen it before)
-        # We also check if it's installable (has github_url and install_path)
-        if tool_data.get('github_url') and tool_data.get('install_path') and \
-           tool_name not in installed_tools_names and \
-           tool_name not in local_flat_tools: # Check if it's genuinely new to our config
-            new_tools.append(tool_data)
-
-    # Check for updates to installed tools
-    print_colored_update_checker("\n[*] Checking for updates to installed tools (this might take a moment)...", "blue")
-    for tool_name in installed_tools_names:
-        if tool_name in local_flat_tools: # Ensure it's a tool managed by UHT
-            local_tool_data = local_flat_tools[tool_name]
-            tool_path_str = local_tool_data.get('install_path')
-            repo_url = local_tool_data.get('github_url')
-
-            if tool_path_str and repo_url: # Only check if it's a clonable tool
-                tool_path = Path(tool_path_str)
-
-                if tool_path.is_dir() and (tool_path / '.git').is_dir():
-                    try:
-                        # Fetch latest info from remote
-                        subprocess.run(['git', '-C', str(tool_path), 'fetch', '--all'], check=True, capture_output=True)
-                        # Compare local branch with remote tracking branch
-                        result = subprocess.run(['git', '-C', str(tool_path), 'status', '-uno'], check=True, capture_output=True, text=True)
-                        
-                        if "Your branch is behind" in result.stdout or "have diverged" in result.stdout:
-                            tools_to_update.append(local_tool_data)
-                            logging.info(f"Update available for {tool_name}.")
-                        # More advanced check: compare local HEAD commit with remote HEAD commit
-                        # local_head = subprocess.check_output(['git', '-C', str(tool_path), 'rev-parse', 'HEAD']).strip().decode()
-                        # remote_head = subprocess.check_output(['git', '-C', str(tool_path), 'rev-parse', 'origin/main']).strip().decode() # Assuming 'main' branch
-                        # if local_head != remote_head:
-                        #    tools_to_update.append(local_tool_data)
-
-                    except subprocess.CalledProcessError as e:
-                        logging.warning(f"Could not check update for {tool_name} (git error): {e.stderr.strip()}")
-                        print_colored_update_checker(f"[WARNING] Could not check update for {tool_name} (Git error). See logs.", "yellow")
-                    except Exception as e:
-                        logging.warning(f"Unexpected error checking update for {tool_name}: {e}")
-                        print_colored_update_checker(f"[WARNING] Unexpected error checking update for {tool_name}. See logs.", "yellow")
-                else:
-                    logging.info(f"Skipping update check for {tool_name}: not a git repository or install path missing.")
-            else:
-                logging.info(f"Skipping update check for {tool_name}: no github_url or install_path defined.")
+    # A tool is "new" if it's in the remote list but not in our local installed directories
+    # AND it's not already present in our local tools.json (meaning we haven't seen it before)
+    # We also check if it's installable (has github_url and install_path)
+    new_tools = [tool_data for tool_name, tool_data in remote_flat_tools.items()
+                 if tool_data.get('github_url') and tool_data.get('install_path')
+                 and tool_name not in installed_set
+                 and tool_name not in local_flat_tools] # Check if it's genuinely new to our config
+
+    # Check for updates to installed tools. The local HEADs are read first; then the
+    # remote HEAD of each distinct repository is looked up once and compared against
+    # every tool cloned from it. Both steps are I/O-bound, so they run concurrently.
+    print_colored("\n[*] Checking for updates to installed tools (this might take a moment)...", "blue")
+    candidates = [local_flat_tools[tool_name] for tool_name in installed_set
+                  if tool_name in local_flat_tools] # Ensure it's a tool managed by UHT
+    if candidates:
+        with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 4) * 4)) as executor:
+            local_heads = [(tool_data, local_head)
+                           for tool_data, local_head in zip(candidates, executor.map(_read_tool_head, candidates))
+                           if local_head is not None]
+
+            tool_names_by_url = {}
+            for tool_data, _ in local_heads:
+                tool_names_by_url.setdefault(tool_data['github_url'], []).append(tool_data['name'])
+
+            # Reuse remote HEADs looked up within the last UPDATE_CHECK_TTL seconds
+            update_cache = _load_update_cache()
+            now = time.time()
+            remote_heads = {}
+            for repo_url in tool_names_by_url:
+                cached = update_cache.get(repo_url)
+                if isinstance(cached, dict) and now - cached.get('ts', 0) < UPDATE_CHECK_TTL:
+                    remote_heads[repo_url] = cached['sha']
+                    logger.info("Using remote HEAD for %s checked within the last %ss.", repo_url, UPDATE_CHECK_TTL)
+            stale_urls = [repo_url for repo_url in tool_names_by_url if repo_url not in remote_heads]
+            stale_heads = executor.map(lambda repo_url: _ls_remote_head(repo_url, tool_names_by_url[repo_url]), stale_urls)
+
+            fetched_any = False
+            for repo_url, remote_head in zip(stale_urls, stale_heads):
+                if remote_head is not None:
+                    remote_heads[repo_url] = remote_head
+                    update_cache[repo_url] = {'sha': remote_head, 'ts': time.time()}
+                    fetched_any = True
+        if fetched_any:
+            _save_update_cache(update_cache)
+
+        for tool_data, local_head in local_heads:
+            remote_head = remote_heads.get(tool_data['github_url'])
+            if remote_head is not None and local_head != remote_head:
+                logger.info("Update available for %s.", tool_data['name'])
+                tools_to_update.append(tool_data)
 
     return new_tools, tools_to_update
 
 def display_update_status(new_tools, tools_to_update):
     """Displays the found new tools and tools with updates."""
-    print_colored_update_checker("\n--- Update Status ---", "yellow")
+    lines = [("\n--- Update Status ---", "yellow")]
 
     if new_tools:
-        print_colored_update_checker("\nNew Tools Available:", "cyan")
-        for tool in new_tools:
-            print_colored_update_checker(f"- {tool['name']} ({tool.get('description', 'No description')})", "green")
+        lines.append(("\nNew Tools Available:", "cyan"))
+        lines.extend((f"- {tool['name']} ({tool.get('description', 'No description')})", "green") for tool in new_tools)
     else:
-        print_colored_update_checker("\nNo new tools found.", "yellow")
+        lines.append(("\nNo new tools found.", "yellow"))
 
     if tools_to_update:
-        print_colored_update_checker("\nTools with Available Updates:", "cyan")
-        for tool in tools_to_update:
-            print_colored_update_checker(f"- {tool['name']}", "green")
+        lines.append(("\nTools with Available Updates:", "cyan"))
+        lines.extend((f"- {tool['name']}", "green") for tool in tools_to_update)
     else:
-        print_colored_update_checker("\nAll installed tools are up-to-date.", "yellow")
+        lines.append(("\nAll installed tools are up-to-date.", "yellow"))
 
-    print_colored_update_checker("\n--- End of Status ---", "yellow")
+    lines.append(("\n--- End of Status ---", "yellow"))
+    print_colored_lines(lines)
     # input(colored("\nPress Enter to return to main menu...", 'green')) # Removed input here, handled by main
@@ -1,5 +1,6 @@
+import functools
 import json
-import logging
+from itertools import chain
 import sys
 from pathlib import Path
 from termcolor import colored
@@ -7,125 +8,131 @@ import os
 import subprocess
 
 # Import UHT modules
-from lib.os_utils import get_os_type, install_system_package # install_system_package is now in os_utils
+from lib._json import json_loads # orjson when installed, else the stdlib parser
+from lib._logger import logger # Logging is configured once, in lib._logger
+from lib.os_utils import get_os_type, announce_os_type, install_system_package # install_system_package is now in os_utils
 from lib.menu_handler import (
     clear_screen, display_banner, display_main_menu,
     display_tool_menu, display_tool_options, confirm_action
 )
 from lib.tool_manager import install_tool, run_tool, get_installed_tools_names
-from lib.update_checker import get_remote_tools_data, check_for_tool_updates_and_new_tools, display_update_status
+# lib.update_checker (and with it requests) is imported only when an update check is requested
 
 
-# --- Setup Logging ---
-log_file_path = Path('logs/uht.log')
-log_file_path.parent.mkdir(parents=True, exist_ok=True)
-logging.basicConfig(filename=str(log_file_path), level=logging.INFO,
-                    format='%(asctime)s - %(levelname)s - %(message)s')
-
 # --- Global Variables ---
+UHT_ROOT = Path(__file__).resolve().parent # Repository root, used for self-update
 UHT_VERSION = "Unknown"
 TOOLS_DIR = "tools"
 REMOTE_TOOLS_JSON_URL = ""
 TOOLS_DATA = {}
+TOOLS_DATA_FLAT = {} # Tool name -> tool data, flattened across categories
+COMPAT_INDEX = {} # Category -> tools compatible with OS_TYPE, built by load_config
+CATEGORIES = [] # Category names in menu order
+MAIN_MENU = {} # Main menu choice string -> (action, category name or None)
 OS_TYPE = get_os_type() # Get OS type once at startup
 
 # --- Load Configuration ---
+@functools.lru_cache(maxsize=8)
+def _load_json_cached(path_str, mtime_ns, size):
+    """Parses a JSON file. Cached per (path, mtime, size), so an unchanged file is parsed only once."""
+    with open(path_str, 'rb') as f:
+        return json_loads(f.read())
+
+def _load_json(path):
+    """Returns the parsed contents of a JSON file, re-parsing only when the file has changed."""
+    stat_result = os.stat(path)
+    return _load_json_cached(str(path), stat_result.st_mtime_ns, stat_result.st_size)
+
+def _is_compat(tool, os_type):
+    """Returns True if a tool should be offered on the given OS type."""
+    os_compat_list = tool.get('os_compat', [])
+    if os_type in os_compat_list or "any" in os_compat_list: # Explicitly handle "any" OS compatibility
+        return True
+    # If os_compat_list is empty, treat as universally compatible (unless explicitly skipped)
+    return not os_compat_list and not tool.get('skip_if_os_not_supported', False)
+
 def load_config():
     """Loads settings and tools data from JSON files."""
-    global UHT_VERSION, TOOLS_DIR, REMOTE_TOOLS_JSON_URL, TOOLS_DATA
+    global UHT_VERSION, TOOLS_DIR, REMOTE_TOOLS_JSON_URL, TOOLS_DATA, TOOLS_DATA_FLAT, COMPAT_INDEX
+    global CATEGORIES, MAIN_MENU
 
     settings_path = Path('config/settings.json')
     tools_path = Path('config/tools.json')
 
     try:
-        with open(settings_path, 'r') as f:
-            settings = json.load(f)
-            UHT_VERSION = settings.get("UHT_VERSION", "Unknown")
-            TOOLS_DIR = settings.get("TOOLS_DIR", "tools")
-            REMOTE_TOOLS_JSON_URL = settings.get("REMOTE_TOOLS_JSON_URL", "")
+        settings = _load_json(settings_path)
+        UHT_VERSION = settings.get("UHT_VERSION", "Unknown")
+        TOOLS_DIR = settings.get("TOOLS_DIR", "tools")
+        REMOTE_TOOLS_JSON_URL = settings.get("REMOTE_TOOLS_JSON_URL", "")
     except FileNotFoundError:
-        logging.error(f"Settings file not found: {settings_path}")
+        logger.error("Settings file not found: %s", settings_path)
         print(colored(f"[ERROR] Settings file not found: {settings_path}. Run install.sh.", 'red'))
         sys.exit(1)
     except json.JSONDecodeError as e:
-        logging.error(f"Error parsing settings.json: {e}")
+        logger.error("Error parsing settings.json: %s", e)
         print(colored(f"[ERROR] Error parsing settings.json: {e}. Check file format.", 'red'))
         sys.exit(1)
 
     try:
-        with open(tools_path, 'r') as f:
-            TOOLS_DATA = json.load(f)
+        TOOLS_DATA = _load_json(tools_path)
+        TOOLS_DATA_FLAT = {tool['name']: tool for tool in chain.from_iterable(TOOLS_DATA.values())}
+        # The OS cannot change during a session, so filter each category once here
+        # rather than on every menu display
+        COMPAT_INDEX = {category: [tool for tool in category_tools if _is_compat(tool, OS_TYPE)]
+                        for category, category_tools in TOOLS_DATA.items()}
+        # Main menu dispatch table; the fixed options follow the categories
+        CATEGORIES = list(TOOLS_DATA.keys())
+        MAIN_MENU = {str(i + 1): ("category", category) for i, category in enumerate(CATEGORIES)}
+        MAIN_MENU[str(len(CATEGORIES) + 1)] = ("update_check", None)
+        MAIN_MENU[str(len(CATEGORIES) + 2)] = ("self_update", None)
+        MAIN_MENU["0"] = ("exit", None)
     except FileNotFoundError:
-        logging.error(f"Tools data file not found: {tools_path}")
+        logger.error("Tools data file not found: %s", tools_path)
         print(colored(f"[ERROR] Tools data file not found: {tools_path}. Run install.sh.", 'red'))
         sys.exit(1)
     except json.JSONDecodeError as e:
-        logging.error(f"Error parsing tools.json: {e}")
+        logger.error("Error parsing tools.json: %s", e)
         print(colored(f"[ERROR] Error parsing tools.json: {e}. Check file format.", 'red'))
         sys.exit(1)
 
 def self_update_uht():
     """Updates the UHT framework itself via git pull."""
     print(colored("\n[*] Updating UHT Framework...", 'blue'))
-    logging.info("Starting UHT self-update.")
+    logger.info("Starting UHT self-update.")
     try:
-        subprocess.run(['git', 'pull'], check=True, cwd=Path(__file__).parent)
+        subprocess.run(['git', 'pull'], check=True, cwd=UHT_ROOT)
         print(colored("[+] UHT Framework updated successfully!", 'green'))
-        logging.info("UHT Framework updated successfully.")
+        logger.info("UHT Framework updated successfully.")
         load_config() # Reload config to get new version if updated
     except subprocess.CalledProcessError as e:
         print(colored(f"[ERROR] Failed to update UHT Framework: {e}", 'red'))
-        logging.error(f"Failed to update UHT Framework: {e}")
+        logger.error("Failed to update UHT Framework: %s", e)
     except Exception as e:
         print(colored(f"[ERROR] An unexpected error occurred during UHT update: {e}", 'red'))
-        logging.error(f"Unexpected error during UHT update: {e}")
+        logger.error("Unexpected error during UHT update: %s", e)
     input(colored("\nPress Enter to continue...", 'green'))
 
 
 def main():
     """Main function to run the UHT CLI."""
+    announce_os_type()
     load_config()
 
     while True:
         display_banner(UHT_VERSION)
-        categories = list(TOOLS_DATA.keys())
-        main_menu_choice = display_main_menu(categories)
+        main_menu_choice = display_main_menu(CATEGORIES)
+        action, selected_category_name = MAIN_MENU.get(main_menu_choice, ("invalid", None))
 
-        if main_menu_choice == "0":
+        if action == "exit":
             print(colored("\nExiting UHT. Goodbye!", 'red'))
             break
-        elif main_menu_choice.isdigit() and 1 <= int(main_menu_choice) <= len(categories):
-            selected_category_index = int(main_menu_choice) - 1
-            selected_category_name = categories[selected_category_index]
-            category_tools = TOOLS_DATA[selected_category_name]
-            
-            # Refined filtering logic for tool compatibility
-            final_compatible_tools = []
-            for tool in category_tools:
-                os_compat_list = tool.get('os_compat', [])
-                skip_if_not_supported = tool.get('skip_if_os_not_supported', False)
-
-                is_compatible = False
-                if OS_TYPE in os_compat_list:
-                    is_compatible = True
-                elif "any" in os_compat_list: # Explicitly handle "any" OS compatibility
-                    is_compatible = True
-                elif not os_compat_list and not skip_if_not_supported:
-                    # If os_compat_list is empty, treat as universally compatible (unless explicitly skipped)
-                    # This case handles tools that don't specify os_compat but are not skipped.
-                    is_compatible = True
-                
-                # If tool explicitly says to skip on unsupported OS, and it's not compatible, then skip.
-                if skip_if_not_supported and not is_compatible:
-                    continue # Skip this tool
-
-                if is_compatible:
-                    final_compatible_tools.append(tool)
+        elif action == "category":
+            final_compatible_tools = COMPAT_INDEX[selected_category_name]
 
             installed_tools_names = get_installed_tools_names(TOOLS_DIR)
 
             while True:
-                tool_menu_choice = display_tool_menu(selected_category_name, final_compatible_tools, installed_tools_names)
+                tool_menu_choice = display_tool_menu(selected_category_name, final_compatible_tools, installed_tools_names, TOOLS_DIR)
 
                 if tool_menu_choice == "B" or tool_menu_choice == "b":
                     break
@@ -156,10 +163,11 @@ def main():
                                 continue
 
                             # Check if the tool is actually installed before running
-                            # Note: get_installed_tools_names checks directory existence.
+                            # Note: installed_tools_names comes from get_installed_tools_names, which checks directory
+                            # existence; it is rebuilt after every install, the only place UHT changes the tools dir.
                             # For tools that are just binaries or single files, this might need refinement
                             # if they don't create a dedicated folder.
-                            if selected_tool_data['name'] not in get_installed_tools_names(TOOLS_DIR):
+                            if selected_tool_data['name'] not in installed_tools_names:
                                 print(colored(f"[!] {selected_tool_data['name']} is not installed. Please install it first.", 'yellow'))
                                 if confirm_action("Do you want to install it now?"):
                                     install_tool(selected_tool_data, OS_TYPE, TOOLS_DIR)
@@ -181,18 +189,19 @@ def main():
                 else:
                     print(colored("Invalid choice. Please try again.", 'red'))
                     input(colored("\nPress Enter to continue...", 'green'))
-        elif main_menu_choice == str(len(categories) + 1): # Check for Updates / New Tools
+        elif action == "update_check": # Check for Updates / New Tools
             clear_screen()
+            from lib.update_checker import get_remote_tools_data, check_for_tool_updates_and_new_tools, display_update_status
             remote_data = get_remote_tools_data(REMOTE_TOOLS_JSON_URL)
             if remote_data:
                 installed_names = get_installed_tools_names(TOOLS_DIR)
-                new_tools, tools_to_update = check_for_tool_updates_and_new_tools(TOOLS_DATA, remote_data, installed_names)
+                new_tools, tools_to_update = check_for_tool_updates_and_new_tools(TOOLS_DATA, remote_data, installed_names, TOOLS_DATA_FLAT)
                 display_update_status(new_tools, tools_to_update)
             else:
                 print(colored("\n[ERROR] Could not perform update check. See logs for details.", 'red'))
             input(colored("\nPress Enter to continue...", 'green')) # Added input here
             
-        elif main_menu_choice == str(len(categories) + 2): # Update UHT Framework (Self-Update)
+        elif action == "self_update": # Update UHT Framework (Self-Update)
             # Ensure git is installed before attempting self-update
             if not install_system_package("git", OS_TYPE):
                 print(colored("\n[ERROR] Git is required for UHT self-update. Please install it manually.", "red"))